@@ -0,0 +1,137 @@
+# bar_cache.py
+
+import pandas as pd
+import os
+import time
+import hashlib
+from datetime import datetime, timedelta
+
+# ====== 缓存配置 ======
+# 历史K线不会改变，按 (symbol, timeframe, start, end, adjustment) 缓存每个分段
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+cache_folder = os.path.join(BASE_DIR, 'data', 'cache')
+EPOCH = datetime(1970, 1, 1)
+
+# 免费数据延迟，只缓存已经"定型"的分段，避免把不完整的最新数据写进缓存
+SETTLE_DAYS = 2
+
+
+def align_windows(start_date, end_date, chunk_days):
+    """把 [start_date, end_date) 切成以 epoch 为基准、长度 chunk_days 的对齐窗口。
+
+    对齐后相邻几天的运行请求的窗口完全相同，重叠部分直接命中缓存。
+    """
+    start_day = (start_date - EPOCH).days
+    first = EPOCH + timedelta(days=start_day - start_day % chunk_days)
+    windows = []
+    current_start = first
+    while current_start < end_date:
+        current_end = current_start + timedelta(days=chunk_days)
+        windows.append((current_start, current_end))
+        current_start = current_end
+    return windows
+
+
+def cache_key(symbol, timeframe, start, end, adjustment):
+    return f"{symbol}|{timeframe}|{start:%Y-%m-%d}|{end:%Y-%m-%d}|{adjustment}"
+
+
+def cache_path(symbol, timeframe, start, end, adjustment, folder=None):
+    key = cache_key(symbol, timeframe, start, end, adjustment)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+    filename = f"{timeframe}_{start:%Y%m%d}_{end:%Y%m%d}_{adjustment}_{digest}.pkl"
+    return os.path.join(folder or cache_folder, symbol, filename)
+
+
+def is_settled(window_end, now=None):
+    now = now or datetime.now()
+    return window_end <= now - timedelta(days=SETTLE_DAYS)
+
+
+def load_chunk(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_pickle(path)
+    except Exception as e:
+        # 损坏的缓存文件（例如写入中途被打断）直接丢弃，重新拉取
+        print(f"⚠️ Dropping unreadable cache file {path}: {e}")
+        os.remove(path)
+        return None
+    # 更新访问时间，供按大小淘汰时作为 LRU 依据
+    os.utime(path, None)
+    return df
+
+
+def store_chunk(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 先写临时文件再原子替换，中断的运行不会留下半个文件
+    tmp_path = path + '.tmp'
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def fetch_bars_cached(fetch_chunk, symbol, timeframe, start_date, end_date,
+                      chunk_days, adjustment='raw', pause=0.3, folder=None):
+    """按对齐窗口拉取K线，已缓存的窗口直接读取本地文件。
+
+    fetch_chunk(start, end) 负责真正的 API 调用并返回原始 DataFrame。
+    每个窗口成功后立刻落盘，所以中途失败的运行重跑时会从断点继续。
+    返回 (窗口 DataFrame 列表, 命中数, 拉取数)。
+    """
+    frames = []
+    hits = fetched = 0
+
+    for window_start, window_end in align_windows(start_date, end_date, chunk_days):
+        path = cache_path(symbol, timeframe, window_start, window_end, adjustment, folder)
+        df = load_chunk(path)
+        if df is not None:
+            hits += 1
+        else:
+            # 末尾窗口只拉到 end_date，不请求未来或延迟期内的数据；这种不完整窗口不写缓存
+            fetch_end = min(window_end, end_date)
+            try:
+                df = fetch_chunk(window_start, fetch_end)
+            except Exception as e:
+                print(f"Error fetching {timeframe} data for {symbol} ({window_start.date()} - {fetch_end.date()}): {e}")
+                time.sleep(1)
+                continue
+            fetched += 1
+            if fetch_end == window_end and is_settled(window_end):
+                store_chunk(df, path)
+            time.sleep(pause)
+        frames.append(df)
+
+    return frames, hits, fetched
+
+
+def evict_cache(max_bytes=None, max_age_days=None, folder=None):
+    """按年龄和总大小淘汰缓存文件，按最近访问时间从旧到新删除。"""
+    folder = folder or cache_folder
+    if not os.path.isdir(folder):
+        return 0
+
+    entries = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            entries.append((stat.st_atime, stat.st_size, path))
+    entries.sort()
+
+    removed = 0
+    total = sum(size for _, size, _ in entries)
+    cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+
+    for atime, size, path in entries:
+        too_old = cutoff is not None and atime < cutoff
+        too_big = max_bytes is not None and total > max_bytes
+        if not (too_old or too_big):
+            continue
+        os.remove(path)
+        total -= size
+        removed += 1
+
+    if removed:
+        print(f"🧹 Evicted {removed} cached chunks from {folder}")
+    return removed
@@ -1,87 +1,85 @@
-import alpaca_trade_api as tradeapi
 import pandas as pd
 import os
 import sqlite3
 from datetime import datetime, timedelta
 import time
+from etl_pipeline import bar_cache
 
 # ====== API 配置 ======
 API_KEY = os.getenv("ALPACA_API_KEY")
 SECRET_KEY = os.getenv("ALPACA_SECRET_KEY")
 BASE_URL = "https://paper-api.alpaca.markets"
-api = tradeapi.REST(API_KEY, SECRET_KEY, BASE_URL)
+_api = None
+
+def get_api():
+    # 延迟创建客户端，导入本模块不会触发 alpaca 导入或网络连接
+    global _api
+    if _api is None:
+        import alpaca_trade_api as tradeapi
+        _api = tradeapi.REST(API_KEY, SECRET_KEY, BASE_URL)
+    return _api
 
 # ====== 股票池 ======
 symbols = ["SPY", "QQQ", "IWM", "AAPL", "MSFT", "NVDA",
            "GOOGL", "META", "JPM", "BAC", "XOM", "CVX", "AMZN", "WMT", "JNJ"]
 
-# ====== 路径与数据库 ======
-data_folder = './data'
-os.makedirs(data_folder, exist_ok=True)
-db_path = os.path.join(data_folder, 'quant_market_data.db')
-
-# 避免拉最新数据（延迟免费兼容）
-end_date = datetime.now() - timedelta(days=2)
-start_date = end_date - timedelta(days=90)
+# ====== 路径 ======
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+data_folder = os.path.join(BASE_DIR, 'data')
+
+# ====== 本地缓存 ======
+minute_chunk_days = 5     # 分钟线按 5 天分段（与限流分段一致）
+daily_chunk_days = 30     # 日线按 30 天分段
+cache_max_bytes = 2 * 1024 ** 3
+cache_max_age_days = 180
+
+# ====== 拉取K线（对齐分段 + 本地缓存） ======
+def _get_bars(symbol, timeframe, start, end, adjustment='raw'):
+    from alpaca_trade_api.rest import TimeFrame
+    return get_api().get_bars(
+        symbol,
+        getattr(TimeFrame, timeframe),
+        start=start.strftime('%Y-%m-%d'),
+        end=end.strftime('%Y-%m-%d'),
+        adjustment=adjustment
+    ).df
+
+def _clip_window(df, time_col, start_date, end_date):
+    # 对齐窗口可能超出请求区间，裁剪回 [start_date, end_date)
+    start = pd.Timestamp(start_date.date(), tz='UTC')
+    end = pd.Timestamp(end_date.date(), tz='UTC')
+    mask = (df[time_col] >= start) & (df[time_col] < end)
+    return df[mask].drop_duplicates(subset=time_col).reset_index(drop=True)
+
+def _combine(frames, symbol, time_col, start_date, end_date):
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames)
+    df.reset_index(inplace=True)
+    df.rename(columns={'timestamp': time_col}, inplace=True)
+    df['symbol'] = symbol
+    return _clip_window(df, time_col, start_date, end_date)
 
 # ====== 拉取分钟线，分段拉取避免限流 ======
-def fetch_minute_data(symbol, start_date, end_date):
+def fetch_minute_data(symbol, start_date, end_date, cache_folder=None):
     print(f"\nFetching minute data for {symbol}")
-    all_dfs = []
-    current_start = start_date
-
-    while current_start < end_date:
-        current_end = min(current_start + timedelta(days=5), end_date)
-        try:
-            df = api.get_bars(
-                symbol,
-                tradeapi.rest.TimeFrame.Minute,
-                start=current_start.strftime('%Y-%m-%d'),
-                end=current_end.strftime('%Y-%m-%d'),
-                adjustment='raw'
-            ).df
-
-            df['symbol'] = symbol
-
-            if not df.empty:
-                df.reset_index(inplace=True)
-                df.rename(columns={'timestamp': 'Datetime'}, inplace=True)
-                all_dfs.append(df)
-
-            time.sleep(0.3)
-
-        except Exception as e:
-            print(f"Error fetching minute data for {symbol} ({current_start.date()} - {current_end.date()}): {e}")
-            time.sleep(1)
-
-        current_start = current_end
-
-    if all_dfs:
-        return pd.concat(all_dfs, ignore_index=True)
-    else:
-        return pd.DataFrame()
+    frames, hits, fetched = bar_cache.fetch_bars_cached(
+        lambda s, e: _get_bars(symbol, 'Minute', s, e),
+        symbol, 'minute', start_date, end_date, minute_chunk_days, folder=cache_folder
+    )
+    print(f"   cache hits: {hits}, fetched: {fetched}")
+    return _combine(frames, symbol, 'Datetime', start_date, end_date)
 
 # ====== 拉取日线 ======
-def fetch_daily_data(symbol, start_date, end_date):
+def fetch_daily_data(symbol, start_date, end_date, cache_folder=None):
     print(f"\nFetching daily data for {symbol}")
-    try:
-        df = api.get_bars(
-            symbol,
-            tradeapi.rest.TimeFrame.Day,
-            start=start_date.strftime('%Y-%m-%d'),
-            end=end_date.strftime('%Y-%m-%d'),
-            adjustment='raw'
-        ).df
-
-        df['symbol'] = symbol
-        if not df.empty:
-            df.reset_index(inplace=True)
-            df.rename(columns={'timestamp': 'Date'}, inplace=True)
-        return df
-
-    except Exception as e:
-        print(f"Error fetching daily data for {symbol}: {e}")
-        return pd.DataFrame()
+    frames, hits, fetched = bar_cache.fetch_bars_cached(
+        lambda s, e: _get_bars(symbol, 'Day', s, e),
+        symbol, 'daily', start_date, end_date, daily_chunk_days, folder=cache_folder
+    )
+    print(f"   cache hits: {hits}, fetched: {fetched}")
+    return _combine(frames, symbol, 'Date', start_date, end_date)
 
 # ====== 保存函数 ======
 def save_to_csv(df, path):
@@ -93,12 +91,18 @@ def save_to_sqlite(df, conn, table_name):
     print(f"✅ Saved SQLite table: {table_name}")
 
 # ====== 主程序 ======
-def main():
-    conn = sqlite3.connect(db_path)
+def main(symbols=symbols, start_date=None, end_date=None, data_folder=data_folder, daily_lookback_days=365):
+    # 避免拉最新数据（延迟免费兼容）
+    end_date = end_date or datetime.now() - timedelta(days=2)
+    start_date = start_date or end_date - timedelta(days=90)
+
+    os.makedirs(data_folder, exist_ok=True)
+    cache_folder = os.path.join(data_folder, 'cache')
+    conn = sqlite3.connect(os.path.join(data_folder, 'quant_market_data.db'))
 
     for symbol in symbols:
         # 拉取分钟线
-        minute_df = fetch_minute_data(symbol, start_date, end_date)
+        minute_df = fetch_minute_data(symbol, start_date, end_date, cache_folder)
         if not minute_df.empty:
             csv_path = os.path.join(data_folder, f'{symbol}_minute.csv')
             save_to_csv(minute_df, csv_path)
@@ -107,7 +111,7 @@ def main():
             print(f"⚠️ No minute data for {symbol}")
 
         # 拉取过去一年日线
-        daily_df = fetch_daily_data(symbol, start_date - timedelta(days=365), end_date)
+        daily_df = fetch_daily_data(symbol, start_date - timedelta(days=daily_lookback_days), end_date, cache_folder)
         if not daily_df.empty:
             csv_path = os.path.join(data_folder, f'{symbol}_daily.csv')
             save_to_csv(daily_df, csv_path)
@@ -118,6 +122,7 @@ def main():
         time.sleep(0.5)
 
     conn.close()
+    bar_cache.evict_cache(max_bytes=cache_max_bytes, max_age_days=cache_max_age_days, folder=cache_folder)
     print("\n🎯 ETL Pipeline Completed: All data fetched and saved.")
 
 if __name__ == "__main__":
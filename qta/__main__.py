@@ -0,0 +1,3 @@
+from qta.cli import main
+
+main()
@@ -0,0 +1,91 @@
+# cli.py
+
+import argparse
+import importlib
+import time
+
+from qta.config import load_config
+
+# 命令 -> (模块, 说明)。模块在命令真正执行时才导入，保持启动速度
+COMMANDS = {
+    'fetch': ('etl_pipeline.fetch_and_store', 'Fetch minute and daily bars from Alpaca'),
+    'analyze': ('etl_pipeline.analyze_daily_data', 'Daily returns, volatility and correlation'),
+    'simulate': ('trades.simulate_trades', 'Run the MA crossover simulation and write trade logs'),
+    'evaluate': ('trades.evaluate_strategy', 'Strategy performance summary per symbol'),
+    'daily': ('trades.s2', 'Cumulative strategy metrics per trading day'),
+    'execution': ('trades.evaluate_execution', 'Execution quality: slippage and participation'),
+    'bootstrap': ('trades.bootstrap_metrics', 'Bootstrap confidence intervals for strategy metrics'),
+    'export': ('tableau.daily_price', 'Combine daily bars for Tableau'),
+    'serve': ('trades.query_service', 'Serve pipeline outputs over HTTP'),
+}
+
+
+def command_kwargs(name, config, args):
+    """把配置映射为各模块 main() 的参数。"""
+    if name == 'fetch':
+        start_date, end_date = config.date_range()
+        return dict(symbols=config.symbols, start_date=start_date, end_date=end_date,
+                    data_folder=config.data_folder, daily_lookback_days=config.daily_lookback_days)
+    if name == 'analyze':
+        return dict(symbols=config.symbols, data_folder=config.data_folder,
+                    plot_folder=config.etl_plot_folder, plots=config.plots)
+    if name == 'simulate':
+        return dict(symbols=config.symbols, data_folder=config.data_folder, plot_folder=config.trade_plot_folder,
+                    trade_folder=config.trade_folder, initial_capital=config.initial_capital, plots=config.plots,
+                    universe=config.universe)
+    if name in ('evaluate', 'daily'):
+        return dict(symbols=config.symbols, trade_folder=config.trade_folder, plot_folder=config.trade_plot_folder,
+                    strategy_folder=config.strategy_folder, plots=config.plots)
+    if name == 'execution':
+        return dict(symbols=config.symbols, trade_folder=config.trade_folder,
+                    market_folder=config.data_folder, output_folder=config.execution_folder)
+    if name == 'bootstrap':
+        return dict(symbols=config.symbols, strategy_folder=config.strategy_folder)
+    if name == 'export':
+        return dict(symbols=config.symbols, input_folder=config.data_folder, output_folder=config.tableau_folder)
+    if name == 'serve':
+        return dict(host=args.host, port=args.port, strategy_folder=config.strategy_folder,
+                    execution_folder=config.execution_folder, market_folder=config.data_folder)
+    raise ValueError(f"Unknown command: {name}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='qta', description='Quantitative Trading Analytics pipeline')
+    parser.add_argument('--config', help='JSON config file (defaults to $QTA_CONFIG)')
+    parser.add_argument('--symbols', help='Comma-separated symbols, overrides the config')
+    parser.add_argument('--start', help='Start date YYYY-MM-DD (fetch)')
+    parser.add_argument('--end', help='End date YYYY-MM-DD (fetch)')
+    parser.add_argument('--no-plots', action='store_true', help='Skip chart generation')
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=help_text)
+        if name == 'serve':
+            sub.add_argument('--host', default='127.0.0.1')
+            sub.add_argument('--port', type=int, default=8765)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        config = load_config(
+            args.config,
+            symbols=[s.strip().upper() for s in args.symbols.split(',')] if args.symbols else None,
+            start_date=args.start,
+            end_date=args.end,
+            plots=False if args.no_plots else None,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    module_name, _ = COMMANDS[args.command]
+    module = importlib.import_module(module_name)
+    started = time.perf_counter()
+    module.main(**command_kwargs(args.command, config, args))
+    print(f"⏱️ {args.command} finished in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
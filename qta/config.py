@@ -0,0 +1,76 @@
+# config.py
+
+import os
+import json
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 配置文件路径也可通过环境变量指定
+CONFIG_ENV = 'QTA_CONFIG'
+
+DEFAULT_SYMBOLS = ["SPY", "QQQ", "IWM", "AAPL", "MSFT", "NVDA",
+                   "GOOGL", "META", "JPM", "BAC", "XOM", "CVX", "AMZN", "WMT", "JNJ"]
+
+
+@dataclass
+class Config:
+    symbols: list = field(default_factory=lambda: list(DEFAULT_SYMBOLS))
+    # 股票池，用于平分资金；默认等于 symbols，--symbols 只缩小本次运行的范围
+    universe: list = None
+
+    # 日期区间，默认为两天前往回 90 天（延迟免费兼容）
+    start_date: str = None
+    end_date: str = None
+    lookback_days: int = 90
+    daily_lookback_days: int = 365
+
+    # 路径，相对路径以项目根目录为基准
+    data_folder: str = 'etl_pipeline/data'
+    etl_plot_folder: str = 'etl_pipeline/plots'
+    trade_folder: str = 'trades/trade_log'
+    trade_plot_folder: str = 'trades/plots'
+    strategy_folder: str = 'trades/strategy'
+    execution_folder: str = 'trades/execution'
+    tableau_folder: str = 'tableau/data'
+
+    initial_capital: float = 100000
+    plots: bool = True
+
+    def __post_init__(self):
+        if self.universe is None:
+            self.universe = list(self.symbols)
+        # 股票池外的 symbol 会按错误的份额分到资金，且不会进入组合交易日志
+        outside = [s for s in self.symbols if s not in self.universe]
+        if outside:
+            raise ValueError(f"Symbols not in universe: {', '.join(outside)}")
+        for f in fields(self):
+            if f.name.endswith('_folder'):
+                setattr(self, f.name, os.path.join(BASE_DIR, getattr(self, f.name)))
+
+    def date_range(self):
+        end = datetime.fromisoformat(self.end_date) if self.end_date else datetime.now() - timedelta(days=2)
+        start = datetime.fromisoformat(self.start_date) if self.start_date else end - timedelta(days=self.lookback_days)
+        return start, end
+
+
+def load_config(path=None, **overrides):
+    """读取 JSON 配置文件（可选），再用非 None 的参数覆盖。"""
+    path = path or os.getenv(CONFIG_ENV)
+    values = {}
+    if path:
+        with open(path) as f:
+            values = json.load(f)
+
+    known = {f.name for f in fields(Config)}
+    unknown = set(values) - known
+    if unknown:
+        raise ValueError(f"Unknown config keys in {path}: {', '.join(sorted(unknown))}")
+
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    # 命令行的 symbols 只是本次运行的子集，股票池仍取配置文件（或默认）中的
+    if 'symbols' in overrides and 'universe' not in values:
+        values['universe'] = values.get('symbols', list(DEFAULT_SYMBOLS))
+    values.update(overrides)
+    return Config(**values)
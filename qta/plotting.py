@@ -0,0 +1,22 @@
+# plotting.py
+
+_pyplot = None
+_style = None
+
+
+def pyplot(style=None):
+    """延迟导入 matplotlib，只有真正画图的命令才付出导入开销。"""
+    global _pyplot, _style
+    if _pyplot is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        _pyplot = plt
+    if style and style != _style:
+        try:
+            _pyplot.style.use(style)
+        except OSError:
+            # matplotlib >= 3.6 把 seaborn 样式改名为 seaborn-v0_8
+            _pyplot.style.use(f'{style}-v0_8')
+        _style = style
+    return _pyplot
@@ -3,22 +3,31 @@ import glob
 import os
 
 # 文件夹路径
-input_folder = '../etl_pipeline/data'
-output_folder = './data'
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+input_folder = os.path.join(BASE_DIR, '..', 'etl_pipeline', 'data')
+output_folder = os.path.join(BASE_DIR, 'data')
 
-# 读取所有csv
-all_files = glob.glob(os.path.join(input_folder, "*_daily.csv"))
+def main(input_folder=input_folder, output_folder=output_folder, symbols=None):
+    os.makedirs(output_folder, exist_ok=True)
 
-# 存放所有股票数据的列表
-df_list = []
+    # 读取所有csv
+    all_files = sorted(glob.glob(os.path.join(input_folder, "*_daily.csv")))
+    if symbols is not None:
+        all_files = [f for f in all_files if os.path.basename(f).split('_daily.csv')[0] in symbols]
 
-for file in all_files:
-    # 读取csv
-    df = pd.read_csv(file)
-    df_list.append(df)
+    # 存放所有股票数据的列表
+    df_list = []
 
-# 合并所有 DataFrame
-all_data = pd.concat(df_list, ignore_index=True)
+    for file in all_files:
+        # 读取csv
+        df = pd.read_csv(file)
+        df_list.append(df)
 
-# 保存为一个合并文件
-all_data.to_csv(os.path.join(output_folder, 'all_stocks_daily.csv'), index=False)
+    # 合并所有 DataFrame
+    all_data = pd.concat(df_list, ignore_index=True)
+
+    # 保存为一个合并文件
+    all_data.to_csv(os.path.join(output_folder, 'all_stocks_daily.csv'), index=False)
+
+if __name__ == "__main__":
+    main()
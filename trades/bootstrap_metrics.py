@@ -0,0 +1,149 @@
+# bootstrap_metrics.py
+
+import pandas as pd
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+strategy_folder = os.path.join(BASE_DIR, 'strategy')
+
+risk_free_rate = 0.02  # 与 evaluate_strategy.py 保持一致
+trading_days_per_year = 252
+
+n_paths = 5000         # 每个 symbol 的 bootstrap 路径数
+batch_size = 1000      # 每批同时生成的路径数，限制内存占用
+confidence = 0.95
+seed = 42
+
+
+def block_bootstrap_indices(rng, n, block_length, paths):
+    """移动块 bootstrap：一次性生成 (paths, n) 的重采样下标矩阵。"""
+    n_blocks = -(-n // block_length)
+    starts = rng.integers(0, n - block_length + 1, size=(paths, n_blocks))
+    idx = starts[:, :, None] + np.arange(block_length)
+    return idx.reshape(paths, -1)[:, :n]
+
+
+def path_metrics(returns, periods_per_year):
+    """对 (paths, n) 的收益率矩阵批量计算 Sharpe、最大回撤、胜率。
+
+    每行是一次交易事件而不是一根分钟线，periods_per_year 按该 symbol 实际的
+    每日交易事件数 * 252 计算。Sharpe 用不复利的算术年化（均值 * 周期数）：
+    evaluate_strategy 的复利年化指数约为 30，重采样后的上界会被放大到毫无意义的量级。
+    """
+    equity = np.cumprod(1 + returns, axis=1)
+
+    annualized_return = returns.mean(axis=1) * periods_per_year
+    annualized_volatility = returns.std(axis=1, ddof=1) * np.sqrt(periods_per_year)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(annualized_volatility != 0,
+                          (annualized_return - risk_free_rate) / annualized_volatility, np.nan)
+
+    drawdown = equity / np.maximum.accumulate(equity, axis=1) - 1
+    max_drawdown = drawdown.min(axis=1)
+
+    wins = (returns > 0).sum(axis=1)
+    losses = (returns < 0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(wins + losses > 0, wins / (wins + losses), np.nan)
+
+    return {'Sharpe Ratio': sharpe, 'Max Drawdown': max_drawdown, 'Win Rate': win_rate}
+
+
+def bootstrap_symbol(args):
+    """对单个 symbol 做 bootstrap，返回置信区间与 p 值。
+
+    置信区间来自原始收益率的重采样。p 值是在"策略没有优势"的原假设下得到不差于
+    实际结果的概率：BUY 行权益不变，约一半收益率恒为 0，所以只对非零（已实现交易）
+    收益率去均值，0 保持为 0；胜率的原假设用符号翻转检验，即每笔交易盈亏各半。
+    """
+    symbol, returns, periods_per_year, seed_seq = args
+    n = len(returns)
+    block_length = max(1, int(round(n ** (1 / 3))))
+    rng = np.random.default_rng(seed_seq)
+
+    observed = {k: v[0] for k, v in path_metrics(returns[None, :], periods_per_year).items()}
+    trade_mask = returns != 0
+    n_trades = int(trade_mask.sum())
+    null_returns = returns.copy()
+    if n_trades:
+        null_returns[trade_mask] -= returns[trade_mask].mean()
+
+    samples = {k: [] for k in observed}
+    null_samples = {k: [] for k in observed}
+    for start in range(0, n_paths, batch_size):
+        paths = min(batch_size, n_paths - start)
+        idx = block_bootstrap_indices(rng, n, block_length, paths)
+        for k, v in path_metrics(returns[idx], periods_per_year).items():
+            samples[k].append(v)
+        null_metrics = path_metrics(null_returns[idx], periods_per_year)
+        null_samples['Sharpe Ratio'].append(null_metrics['Sharpe Ratio'])
+        null_samples['Max Drawdown'].append(null_metrics['Max Drawdown'])
+        # 符号翻转：每笔交易以 1/2 概率为盈利
+        null_samples['Win Rate'].append((rng.random((paths, n_trades)) < 0.5).mean(axis=1)
+                                        if n_trades else np.full(paths, np.nan))
+
+    alpha = 1 - confidence
+    result = {'Symbol': symbol, 'Observations': n, 'Periods per Year': round(periods_per_year, 1),
+              'Paths': n_paths, 'Block Length': block_length}
+    for k, obs in observed.items():
+        dist = np.concatenate(samples[k])
+        null = np.concatenate(null_samples[k])
+        dist, null = dist[~np.isnan(dist)], null[~np.isnan(null)]
+        # 回撤为负数，"不差于"即回撤更浅（数值更大），三个指标方向一致
+        p_value = (np.sum(null >= obs) + 1) / (len(null) + 1) if not np.isnan(obs) else np.nan
+        low, high = np.quantile(dist, [alpha / 2, 1 - alpha / 2]) if len(dist) else (np.nan, np.nan)
+
+        scale = 1 if k == 'Sharpe Ratio' else 100
+        label = 'Sharpe Ratio (Arithmetic)' if k == 'Sharpe Ratio' else f'{k} (%)'
+        result[label] = round(obs * scale, 2)
+        result[f'{label} CI Low'] = round(low * scale, 2)
+        result[f'{label} CI High'] = round(high * scale, 2)
+        result[f'{label} p-value'] = round(p_value, 4)
+
+    return result
+
+
+def main(symbols=None, strategy_folder=strategy_folder):
+    equity_file = os.path.join(strategy_folder, "equity_drawdown_pnl_all.csv")
+    if not os.path.exists(equity_file):
+        print(f"⚠️ {equity_file} not found, run the evaluate command first.")
+        return
+
+    equity_df = pd.read_csv(equity_file, parse_dates=['Datetime'])
+    equity_df.sort_values(['Symbol', 'Datetime'], inplace=True)
+    if symbols is not None:
+        equity_df = equity_df[equity_df['Symbol'].isin(symbols)]
+
+    tasks = []
+    symbols = equity_df['Symbol'].unique()
+    seeds = np.random.SeedSequence(seed).spawn(len(symbols))
+    for symbol, seed_seq in zip(symbols, seeds):
+        symbol_df = equity_df[equity_df['Symbol'] == symbol]
+        equity = symbol_df['Equity'].to_numpy(dtype=float)
+        # 按实际交易事件频率年化：平均每个交易日的行数 * 252
+        trading_days = symbol_df['Datetime'].dt.date.nunique()
+        periods_per_year = len(symbol_df) / max(trading_days, 1) * trading_days_per_year
+        # 与 evaluate_strategy 的 pct_change().fillna(0) 口径一致
+        returns = np.nan_to_num(np.concatenate([[0.0], equity[1:] / equity[:-1] - 1]))
+        if len(returns) < 2:
+            print(f"⚠️ Not enough observations for {symbol}, skipping.")
+            continue
+        tasks.append((symbol, returns, periods_per_year, seed_seq))
+
+    # 每个 symbol 一个任务，分散到多核
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(bootstrap_symbol, tasks))
+
+    for result in results:
+        print(f"✅ Bootstrapped {result['Symbol']}")
+
+    if results:
+        results_df = pd.DataFrame(results)
+        results_df.to_csv(os.path.join(strategy_folder, "trade_performance_bootstrap.csv"), index=False)
+
+    print("\n✅ Bootstrap analysis completed. Confidence intervals saved to strategy folder.")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
 import pandas as pd
 import numpy as np
 import os
-from glob import glob
+from trades.round_trips import list_trade_logs
 
-trade_folder = './trade_log'
-market_folder = '../etl_pipeline/data'
-output_folder = './execution'
-os.makedirs(output_folder, exist_ok=True)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+trade_folder = os.path.join(BASE_DIR, 'trade_log')
+market_folder = os.path.join(BASE_DIR, '..', 'etl_pipeline', 'data')
+output_folder = os.path.join(BASE_DIR, 'execution')
 
 def clean_market_data(market_df):
     # 确保Datetime是datetime类型，转为UTC，精确到分钟
@@ -90,10 +90,10 @@ def calculate_metrics(trade_df, market_df):
 
     return trade_df, metrics
 
-def main():
-    trade_files = glob(os.path.join(trade_folder, "*_trade_log.csv"))
+def main(symbols=None, trade_folder=trade_folder, market_folder=market_folder, output_folder=output_folder):
+    os.makedirs(output_folder, exist_ok=True)
 
-    for trade_file in trade_files:
+    for trade_file in list_trade_logs(trade_folder, symbols):
         try:
             symbol = os.path.basename(trade_file).split('_trade_log.csv')[0]
 
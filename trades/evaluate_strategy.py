@@ -2,22 +2,22 @@
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import os
-from glob import glob
+from qta.plotting import pyplot
+from trades.round_trips import build_round_trips, build_ledger, list_trade_logs, round_trip_statistics
 
-plt.style.use('seaborn')
-
-trade_folder = './trade_log'
-plot_folder = './plots'
-strategy_folder = './strategy'
-
-os.makedirs(strategy_folder, exist_ok=True)
-os.makedirs(plot_folder, exist_ok=True)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+trade_folder = os.path.join(BASE_DIR, 'trade_log')
+plot_folder = os.path.join(BASE_DIR, 'plots')
+strategy_folder = os.path.join(BASE_DIR, 'strategy')
 
 risk_free_rate = 0.02  # for Sharpe Ratio
 
-def calculate_performance_metrics(df, symbol):
+def calculate_performance_metrics(df, symbol, ledger=None):
+    # 交易统计基于 FIFO 往返交易台账，而不是 BUY/SELL 行上的权益变化
+    if ledger is None:
+        ledger = build_round_trips(df)
+
     df['Datetime'] = pd.to_datetime(df['Datetime'])
     df.sort_values('Datetime', inplace=True)
     df.set_index('Datetime', inplace=True)
@@ -38,14 +38,13 @@ def calculate_performance_metrics(df, symbol):
     drawdown = df['Equity'] / rolling_max - 1
     max_drawdown = drawdown.min()
 
-    trades = df[df['Action'].isin(['BUY', 'SELL'])]
-    wins = trades[trades['PnL'] > 0]['PnL']
-    losses = trades[trades['PnL'] < 0]['PnL']
-    win_rate = len(wins) / (len(wins) + len(losses)) if (len(wins) + len(losses)) > 0 else np.nan
-    avg_win = wins.mean() if not wins.empty else 0
-    avg_loss = losses.mean() if not losses.empty else 0
-    profit_factor = -avg_win / avg_loss if avg_loss != 0 else np.nan
-    trade_count = len(trades)
+    trade_stats = round_trip_statistics(ledger)
+    win_rate = trade_stats['Win Rate']
+    avg_win = trade_stats['Avg Win']
+    avg_loss = trade_stats['Avg Loss']
+    profit_factor = trade_stats['Profit Factor']
+    trade_count = trade_stats['Trade Count']
+    avg_holding = trade_stats['Avg Holding Period']
 
     metrics = {
         'Symbol': symbol,
@@ -58,7 +57,8 @@ def calculate_performance_metrics(df, symbol):
         'Avg Win ($)': round(avg_win, 2),
         'Avg Loss ($)': round(avg_loss, 2),
         'Profit Factor': round(profit_factor, 2) if not np.isnan(profit_factor) else 'N/A',
-        'Trade Count': trade_count
+        'Trade Count': trade_count,
+        'Avg Holding Period (min)': round(avg_holding.total_seconds() / 60, 2) if not pd.isna(avg_holding) else 'N/A'
     }
 
     # 新增：为导出CSV准备的DataFrame
@@ -69,7 +69,8 @@ def calculate_performance_metrics(df, symbol):
 
     return metrics, df, drawdown, export_df
 
-def plot_equity_and_drawdown(df, drawdown, symbol):
+def plot_equity_and_drawdown(df, drawdown, symbol, plot_folder=plot_folder):
+    plt = pyplot('seaborn')
     plt.figure(figsize=(14, 7))
     plt.plot(df.index, df['Equity'], label='Equity Curve', color='green')
     plt.title(f"{symbol} Equity Curve")
@@ -89,9 +90,10 @@ def plot_equity_and_drawdown(df, drawdown, symbol):
     plt.savefig(os.path.join(plot_folder, f"{symbol}_drawdown_curve.png"))
     plt.close()
 
-def plot_pnl_distribution(df, symbol):
+def plot_pnl_distribution(ledger, symbol, plot_folder=plot_folder):
+    plt = pyplot('seaborn')
     plt.figure(figsize=(8, 5))
-    df['PnL'].hist(bins=50, color='skyblue', edgecolor='black')
+    ledger['PnL'].hist(bins=50, color='skyblue', edgecolor='black')
     plt.title(f"{symbol} Trade PnL Distribution")
     plt.xlabel('PnL ($)')
     plt.ylabel('Frequency')
@@ -99,37 +101,51 @@ def plot_pnl_distribution(df, symbol):
     plt.savefig(os.path.join(plot_folder, f"{symbol}_pnl_distribution.png"))
     plt.close()
 
-all_metrics = []
-all_equity_data = []  # ✅ 新增：用于合并所有symbol的时间序列数据
+def main(symbols=None, trade_folder=trade_folder, plot_folder=plot_folder, strategy_folder=strategy_folder, plots=True):
+    os.makedirs(strategy_folder, exist_ok=True)
+    if plots:
+        os.makedirs(plot_folder, exist_ok=True)
+
+    all_metrics = []
+    all_equity_data = []  # ✅ 新增：用于合并所有symbol的时间序列数据
+    log_files = list_trade_logs(trade_folder, symbols)
+
+    # 在所有 symbol 的交易日志上一次性配对往返交易
+    ledger = build_ledger(trade_folder, symbols)
+    ledger.to_csv(os.path.join(strategy_folder, "round_trip_ledger.csv"), index=False)
+    ledger_by_symbol = dict(tuple(ledger.groupby('Symbol')))
 
-# Load and analyze all trade logs
-log_files = glob(os.path.join(trade_folder, "*_trade_log.csv"))
+    # Load and analyze all trade logs
+    for file in log_files:
+        try:
+            symbol = os.path.basename(file).split('_trade_log.csv')[0]
+            df = pd.read_csv(file)
 
-for file in log_files:
-    try:
-        symbol = os.path.basename(file).split('_trade_log.csv')[0]
-        df = pd.read_csv(file)
+            symbol_ledger = ledger_by_symbol.get(symbol, ledger.iloc[:0])
+            metrics, df_processed, drawdown, export_df = calculate_performance_metrics(df, symbol, symbol_ledger)
+            all_metrics.append(metrics)
+            all_equity_data.append(export_df)
 
-        metrics, df_processed, drawdown, export_df = calculate_performance_metrics(df, symbol)
-        all_metrics.append(metrics)
-        all_equity_data.append(export_df)
+            if plots:
+                plot_equity_and_drawdown(df_processed, drawdown, symbol, plot_folder)
+                plot_pnl_distribution(symbol_ledger, symbol, plot_folder)
 
-        plot_equity_and_drawdown(df_processed, drawdown, symbol)
-        plot_pnl_distribution(df_processed, symbol)
+            print(f"✅ Processed {symbol}")
 
-        print(f"✅ Processed {symbol}")
+        except Exception as e:
+            print(f"⚠️ Error processing {file}: {e}")
 
-    except Exception as e:
-        print(f"⚠️ Error processing {file}: {e}")
+    # Save metrics summary
+    if all_metrics:
+        metrics_df = pd.DataFrame(all_metrics)
+        metrics_df.to_csv(os.path.join(strategy_folder, "trade_performance_summary.csv"), index=False)
 
-# Save metrics summary
-if all_metrics:
-    metrics_df = pd.DataFrame(all_metrics)
-    metrics_df.to_csv(os.path.join(strategy_folder, "trade_performance_summary.csv"), index=False)
+    # ✅ 保存所有symbol合并后的 equity, drawdown, pnl 时间序列数据
+    if all_equity_data:
+        combined_df = pd.concat(all_equity_data, ignore_index=True)
+        combined_df.to_csv(os.path.join(strategy_folder, "equity_drawdown_pnl_all.csv"), index=False)
 
-# ✅ 保存所有symbol合并后的 equity, drawdown, pnl 时间序列数据
-if all_equity_data:
-    combined_df = pd.concat(all_equity_data, ignore_index=True)
-    combined_df.to_csv(os.path.join(strategy_folder, "equity_drawdown_pnl_all.csv"), index=False)
+    print("\n✅ Trade performance analysis completed. Results saved to plots folder.")
 
-print("\n✅ Trade performance analysis completed. Results saved to plots folder.")
+if __name__ == "__main__":
+    main()
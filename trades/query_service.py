@@ -0,0 +1,318 @@
+# query_service.py
+
+import pandas as pd
+import os
+import json
+import asyncio
+import threading
+from glob import glob
+from collections import OrderedDict
+from datetime import datetime
+from dateutil import parser as date_parser
+from urllib.parse import urlsplit, parse_qs
+
+host = '127.0.0.1'
+port = 8765
+reload_interval = 10     # 秒，轮询流水线输出文件是否更新
+cache_max_bytes = 64 * 1024 ** 2   # LRU 缓存按响应体总字节数限制
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+strategy_folder = os.path.join(BASE_DIR, 'strategy')
+execution_folder = os.path.join(BASE_DIR, 'execution')
+market_folder = os.path.join(BASE_DIR, '..', 'etl_pipeline', 'data')
+
+
+def build_datasets(strategy_folder=strategy_folder, execution_folder=execution_folder, market_folder=market_folder):
+    # 数据集: 文件匹配模式, 时间列（无则为 None）, symbol 列
+    return {
+        'equity': (os.path.join(strategy_folder, 'equity_drawdown_pnl_all.csv'), 'Datetime', 'Symbol'),
+        'daily_metrics': (os.path.join(strategy_folder, 'daily_trade_metrics_all.csv'), 'Date', 'Symbol'),
+        'performance': (os.path.join(strategy_folder, 'trade_performance_summary.csv'), None, 'Symbol'),
+        'bootstrap': (os.path.join(strategy_folder, 'trade_performance_bootstrap.csv'), None, 'Symbol'),
+        'execution': (os.path.join(execution_folder, '*_execution_summary.csv'), None, 'Symbol'),
+        'trade_metrics': (os.path.join(execution_folder, '*_trade_metrics.csv'), 'Datetime', 'Symbol'),
+        'bars': (os.path.join(market_folder, '*_daily.csv'), 'Date', 'symbol'),
+    }
+
+DATASETS = build_datasets()
+
+# /summary 合并的按 symbol 汇总数据集
+SUMMARY_DATASETS = ['performance', 'bootstrap', 'execution']
+
+
+class QueryError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MetricsStore:
+    """一次性加载流水线输出，按 symbol 分组、按时间排序建立索引，并缓存热点查询。"""
+
+    def __init__(self, datasets=DATASETS, cache_max_bytes=cache_max_bytes):
+        self.datasets = datasets
+        self._files = {}         # path -> (mtime, DataFrame)
+        self._paths = {}         # dataset -> set(path)
+        self._index = {}         # dataset -> {symbol: DataFrame}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._cache = OrderedDict()   # 查询键 -> 序列化后的响应体
+        self._cache_bytes = 0
+        self._cache_max_bytes = cache_max_bytes
+        self._cache_lock = threading.Lock()
+
+    def _read_file(self, path, time_col):
+        df = pd.read_csv(path)
+        if time_col and time_col in df.columns:
+            df[time_col] = pd.to_datetime(df[time_col], utc=True)
+        return df
+
+    def refresh(self):
+        """只重新读取有变化的文件，只重建受影响的数据集。返回是否有更新。"""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        changed = set()
+        index = dict(self._index)
+
+        for name, (pattern, time_col, symbol_col) in self.datasets.items():
+            paths = sorted(glob(pattern))
+            previous = self._paths.get(name, set())
+            dirty = False
+
+            for path in paths:
+                mtime = os.path.getmtime(path)
+                cached = self._files.get(path)
+                if cached is not None and cached[0] == mtime:
+                    continue
+                try:
+                    self._files[path] = (mtime, self._read_file(path, time_col))
+                except Exception as e:
+                    print(f"⚠️ Error loading {path}: {e}")
+                    continue
+                dirty = True
+
+            # 只记录成功加载过的文件，读取失败的文件下次轮询会重试
+            loaded = {path for path in paths if path in self._files}
+            dirty = dirty or previous != loaded
+            for path in previous - set(paths):
+                self._files.pop(path, None)
+
+            if dirty:
+                index[name] = self._build_index(paths, time_col, symbol_col)
+                self._paths[name] = loaded
+                changed.add(name)
+
+        if changed:
+            self._index = index
+            self._generation += 1
+            with self._cache_lock:
+                self._cache.clear()
+                self._cache_bytes = 0
+            print(f"🔄 Reloaded datasets: {', '.join(sorted(changed))}")
+        return bool(changed)
+
+    def _build_index(self, paths, time_col, symbol_col):
+        frames = [self._files[p][1] for p in paths if p in self._files]
+        if not frames:
+            return {}
+        df = pd.concat(frames, ignore_index=True)
+        if symbol_col not in df.columns:
+            return {}
+        grouped = {}
+        for symbol, group in df.groupby(symbol_col, sort=False):
+            if time_col and time_col in group.columns:
+                group = group.sort_values(time_col).set_index(time_col, drop=False)
+            grouped[str(symbol)] = group
+        return grouped
+
+    def symbols(self, dataset):
+        return sorted(self._index.get(dataset, {}))
+
+    def describe(self):
+        return {
+            name: {
+                'symbols': len(self._index.get(name, {})),
+                'rows': int(sum(len(df) for df in self._index.get(name, {}).values())),
+            }
+            for name in self.datasets
+        }
+
+    def query(self, dataset, symbol=None, start=None, end=None):
+        if dataset not in self.datasets:
+            raise QueryError(404, f"Unknown dataset: {dataset}")
+        start = self._parse_time(start)
+        end_inclusive = not self._is_date_only(end)
+        end = self._parse_time(end)
+        if not end_inclusive:
+            # 只给日期的 end 包含当天全天：换成次日零点并作为开区间
+            end = end + pd.Timedelta(days=1)
+        return self._query(self._generation, dataset, symbol, start, end, end_inclusive)
+
+    def summary(self, symbol=None):
+        return self._query(self._generation, None, symbol, None, None, True)
+
+    @staticmethod
+    def _is_date_only(value):
+        # 用两个不同的默认小时解析：结果小时相同说明字符串里带了时间部分（如 2025-04-22T15）
+        if value is None:
+            return False
+        try:
+            return (date_parser.parse(value, default=datetime(2000, 1, 1, 0)).hour
+                    != date_parser.parse(value, default=datetime(2000, 1, 1, 12)).hour)
+        except (ValueError, OverflowError):
+            return False
+
+    @staticmethod
+    def _parse_time(value):
+        if value is None:
+            return None
+        try:
+            ts = pd.Timestamp(value)
+        except ValueError:
+            raise QueryError(400, f"Invalid date: {value}")
+        return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+
+    def _slice(self, dataset, symbol, start, end, end_inclusive=True):
+        _, time_col, _ = self.datasets[dataset]
+        groups = self._index.get(dataset, {})
+        if symbol is not None:
+            if symbol not in groups:
+                return pd.DataFrame()
+            groups = {symbol: groups[symbol]}
+
+        frames = []
+        for df in groups.values():
+            if time_col and (start is not None or end is not None):
+                # 索引已按时间排序，二分查找切片
+                lo = df.index.searchsorted(start, side='left') if start is not None else 0
+                hi = df.index.searchsorted(end, side='right' if end_inclusive else 'left') if end is not None else len(df)
+                df = df.iloc[lo:hi]
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _query(self, *key):
+        # key 以 generation 开头，保证重新加载后不会命中旧结果
+        with self._cache_lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                return body
+
+        body = self._query_uncached(*key)
+        if len(body) > self._cache_max_bytes:
+            return body
+
+        with self._cache_lock:
+            if key not in self._cache:
+                self._cache[key] = body
+                self._cache_bytes += len(body)
+            # 按总字节数淘汰最久未使用的条目
+            while self._cache_bytes > self._cache_max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+        return body
+
+    def _query_uncached(self, generation, dataset, symbol, start, end, end_inclusive):
+        if dataset is None:
+            body = {}
+            for name in SUMMARY_DATASETS:
+                df = self._slice(name, symbol, None, None)
+                body[name] = json.loads(df.to_json(orient='records', date_format='iso')) if not df.empty else []
+            return json.dumps(body).encode('utf-8')
+
+        df = self._slice(dataset, symbol, start, end, end_inclusive)
+        if df.empty:
+            return b'[]'
+        return df.to_json(orient='records', date_format='iso').encode('utf-8')
+
+
+# ====== HTTP 服务 ======
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+async def route(store, method, target):
+    url = urlsplit(target)
+    params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    parts = [p for p in url.path.split('/') if p]
+    loop = asyncio.get_running_loop()
+
+    if method == 'POST' and parts == ['reload']:
+        changed = await loop.run_in_executor(None, store.refresh)
+        return json.dumps({'reloaded': changed}).encode('utf-8')
+    if method != 'GET':
+        raise QueryError(405, f"Method not allowed: {method}")
+
+    if parts == ['datasets']:
+        return json.dumps(store.describe()).encode('utf-8')
+    if parts == ['summary']:
+        # 未命中缓存时要切片、序列化整块数据，放到线程池里避免阻塞事件循环
+        return await loop.run_in_executor(None, store.summary, params.get('symbol'))
+    if len(parts) == 2 and parts[0] == 'data':
+        # start/end 为闭区间（UTC）；只给日期的 end（如 2025-04-22）包含当天全部数据
+        return await loop.run_in_executor(None, store.query, parts[1], params.get('symbol'),
+                                          params.get('start'), params.get('end'))
+    if len(parts) == 2 and parts[0] == 'symbols':
+        return json.dumps(store.symbols(parts[1])).encode('utf-8')
+    raise QueryError(404, f"Unknown path: {url.path}")
+
+
+async def handle_client(store, reader, writer):
+    status, body = 200, b''
+    try:
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass  # 忽略请求头
+        method, target, _ = request_line.split(' ', 2)
+        body = await route(store, method, target)
+    except QueryError as e:
+        status, body = e.status, json.dumps({'error': str(e)}).encode('utf-8')
+    except ValueError:
+        status, body = 400, json.dumps({'error': 'Malformed request'}).encode('utf-8')
+    except Exception as e:
+        print(f"⚠️ Error handling request: {e}")
+        status, body = 500, json.dumps({'error': str(e)}).encode('utf-8')
+
+    header = (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode('latin-1')
+    writer.write(header + body)
+    try:
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def watch(store):
+    # 流水线跑完会覆盖输出文件，轮询 mtime 后增量重新加载
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(reload_interval)
+        try:
+            await loop.run_in_executor(None, store.refresh)
+        except Exception as e:
+            print(f"⚠️ Error reloading data: {e}")
+
+
+async def serve(store, host=host, port=port):
+    store.refresh()
+    server = await asyncio.start_server(lambda r, w: handle_client(store, r, w), host, port)
+    print(f"✅ Query service listening on http://{host}:{port}")
+    async with server:
+        await asyncio.gather(server.serve_forever(), watch(store))
+
+
+def main(host=host, port=port, strategy_folder=strategy_folder, execution_folder=execution_folder,
+         market_folder=market_folder):
+    store = MetricsStore(build_datasets(strategy_folder, execution_folder, market_folder))
+    try:
+        asyncio.run(serve(store, host, port))
+    except KeyboardInterrupt:
+        print("\n👋 Query service stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# round_trips.py
+
+import pandas as pd
+import numpy as np
+import os
+from glob import glob
+
+LEDGER_COLUMNS = ['Symbol', 'Entry_Time', 'Exit_Time', 'Holding_Period', 'Shares',
+                  'Entry_Price', 'Exit_Price', 'PnL', 'Return']
+
+
+def build_round_trips(trade_df):
+    """按 symbol 以 FIFO 方式配对买卖，生成逐笔往返交易台账。
+
+    不用逐行循环：每个 symbol 的买入、卖出累计股数各自把 [0, 已平仓股数) 切成区间，
+    两组区间端点合并后的每一小段恰好对应一对 (买入, 卖出)。各 symbol 的累计股数
+    加上偏移量拼接在同一条数轴上，一次 searchsorted 即可完成全部配对。
+    假设策略只做多（卖出不早于对应的买入），未平仓的剩余买入不计入台账。
+    """
+    df = trade_df[['Symbol', 'Datetime', 'Action', 'Price', 'Shares']].copy()
+    df['Datetime'] = pd.to_datetime(df['Datetime'])
+    df = df[df['Action'].isin(['BUY', 'SELL'])]
+    df = df.sort_values(['Symbol', 'Datetime'], kind='mergesort').reset_index(drop=True)
+    if df.empty:
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+
+    is_buy = (df['Action'] == 'BUY').to_numpy()
+    shares = df['Shares'].to_numpy(dtype=float)
+    grouped = pd.DataFrame({
+        'Symbol': df['Symbol'],
+        'Buy': np.where(is_buy, shares, 0.0),
+        'Sell': np.where(is_buy, 0.0, shares),
+    }).groupby('Symbol', sort=False)
+
+    cum_buy = grouped['Buy'].cumsum().to_numpy()
+    cum_sell = grouped['Sell'].cumsum().to_numpy()
+
+    # 每个 symbol 只有 min(总买入, 总卖出) 股能配对平仓
+    matched_by_symbol = np.minimum(grouped['Buy'].sum(), grouped['Sell'].sum())
+    offset_by_symbol = matched_by_symbol.cumsum() - matched_by_symbol
+    matched = df['Symbol'].map(matched_by_symbol).to_numpy()
+    offset = df['Symbol'].map(offset_by_symbol).to_numpy()
+
+    buy_ends = (offset + np.clip(cum_buy, 0, matched))[is_buy]
+    sell_ends = (offset + np.clip(cum_sell, 0, matched))[~is_buy]
+    buys = df[is_buy].reset_index(drop=True)
+    sells = df[~is_buy].reset_index(drop=True)
+
+    boundaries = np.unique(np.concatenate([[0.0], buy_ends, sell_ends]))
+    lo, hi = boundaries[:-1], boundaries[1:]
+    mid = (lo + hi) / 2
+    buy_idx = np.searchsorted(buy_ends, mid, side='right')
+    sell_idx = np.searchsorted(sell_ends, mid, side='right')
+
+    entry_price = buys['Price'].to_numpy(dtype=float)[buy_idx]
+    exit_price = sells['Price'].to_numpy(dtype=float)[sell_idx]
+    qty = hi - lo
+
+    ledger = pd.DataFrame({
+        'Symbol': buys['Symbol'].take(buy_idx).to_numpy(),
+        'Entry_Time': buys['Datetime'].take(buy_idx).reset_index(drop=True),
+        'Exit_Time': sells['Datetime'].take(sell_idx).reset_index(drop=True),
+        'Shares': qty,
+        'Entry_Price': entry_price,
+        'Exit_Price': exit_price,
+        'PnL': (exit_price - entry_price) * qty,
+        'Return': exit_price / entry_price - 1,
+    })
+    ledger['Holding_Period'] = ledger['Exit_Time'] - ledger['Entry_Time']
+    return ledger[LEDGER_COLUMNS]
+
+
+def round_trip_statistics(ledger):
+    """由往返交易台账计算胜率、平均盈亏、盈亏因子和交易次数。"""
+    pnl = ledger['PnL']
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    win_rate = len(wins) / (len(wins) + len(losses)) if (len(wins) + len(losses)) > 0 else np.nan
+    avg_win = wins.mean() if not wins.empty else 0
+    avg_loss = losses.mean() if not losses.empty else 0
+    profit_factor = wins.sum() / -losses.sum() if not losses.empty else np.nan
+    return {
+        'Win Rate': win_rate,
+        'Avg Win': avg_win,
+        'Avg Loss': avg_loss,
+        'Profit Factor': profit_factor,
+        'Trade Count': len(ledger),
+        'Avg Holding Period': ledger['Holding_Period'].mean() if not ledger.empty else pd.NaT,
+    }
+
+
+def daily_round_trip_statistics(ledger, dates):
+    """按平仓日期累计的交易统计，每个日期只计入当天及之前已平仓的往返交易。"""
+    pnl = ledger['PnL']
+    daily = pd.DataFrame({
+        'Date': ledger['Exit_Time'].dt.date,
+        'Wins': (pnl > 0).astype(int),
+        'Losses': (pnl < 0).astype(int),
+        'Gross_Profit': pnl.clip(lower=0),
+        'Gross_Loss': pnl.clip(upper=0),
+        'Trades': 1,
+    }).groupby('Date').sum().cumsum()
+    daily = daily.reindex(pd.Index(sorted(set(daily.index) | set(dates)))).ffill().fillna(0).loc[list(dates)]
+
+    decided = daily['Wins'] + daily['Losses']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stats = pd.DataFrame({
+            'Win Rate': np.where(decided > 0, daily['Wins'] / decided, np.nan),
+            'Avg Win': np.where(daily['Wins'] > 0, daily['Gross_Profit'] / daily['Wins'], 0),
+            'Avg Loss': np.where(daily['Losses'] > 0, daily['Gross_Loss'] / daily['Losses'], 0),
+            'Profit Factor': np.where(daily['Losses'] > 0, daily['Gross_Profit'] / -daily['Gross_Loss'], np.nan),
+            'Trade Count': daily['Trades'].astype(int),
+        }, index=daily.index)
+    return stats
+
+
+def list_trade_logs(trade_folder, symbols=None):
+    """列出各 symbol 的交易日志文件，跳过组合日志。"""
+    log_files = sorted(glob(os.path.join(trade_folder, "*_trade_log.csv")))
+    log_files = [f for f in log_files if not os.path.basename(f).startswith('combined_')]
+    if symbols is not None:
+        log_files = [f for f in log_files if os.path.basename(f).split('_trade_log.csv')[0] in symbols]
+    return log_files
+
+
+def build_ledger(trade_folder, symbols=None):
+    """由各 symbol 的交易日志生成台账；与权益曲线使用同一批日志，保证覆盖的 symbol 完全一致。"""
+    log_files = list_trade_logs(trade_folder, symbols)
+    if not log_files:
+        return build_round_trips(pd.DataFrame(columns=['Symbol', 'Datetime', 'Action', 'Price', 'Shares']))
+    return build_round_trips(pd.concat([pd.read_csv(f) for f in log_files], ignore_index=True))
@@ -1,21 +1,20 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import os
-from glob import glob
+from qta.plotting import pyplot
+from trades.round_trips import build_round_trips, build_ledger, list_trade_logs, daily_round_trip_statistics
 
-plt.style.use('seaborn')
-
-trade_folder = './trade_log'
-plot_folder = './plots'
-strategy_folder = './strategy'
-
-os.makedirs(strategy_folder, exist_ok=True)
-os.makedirs(plot_folder, exist_ok=True)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+trade_folder = os.path.join(BASE_DIR, 'trade_log')
+plot_folder = os.path.join(BASE_DIR, 'plots')
+strategy_folder = os.path.join(BASE_DIR, 'strategy')
 
 risk_free_rate = 0.02  # for Sharpe Ratio
 
-def calculate_daily_metrics(df, symbol):
+def calculate_daily_metrics(df, symbol, ledger=None):
+    if ledger is None:
+        ledger = build_round_trips(df)
+
     df['Datetime'] = pd.to_datetime(df['Datetime'])
     df.sort_values('Datetime', inplace=True)
     df['Date'] = df['Datetime'].dt.date
@@ -30,6 +29,8 @@ def calculate_daily_metrics(df, symbol):
 
     daily_metrics = []
     unique_dates = df['Date'].unique()
+    # 截至每个日期已平仓往返交易的累计统计
+    trade_stats = daily_round_trip_statistics(ledger, unique_dates)
 
     for current_date in unique_dates:
         subset = df[df['Date'] <= current_date]
@@ -45,14 +46,12 @@ def calculate_daily_metrics(df, symbol):
         sharpe = (ann_return - risk_free_rate) / ann_vol if ann_vol != 0 else np.nan
         max_dd = subset['Drawdown'].min()
 
-        trades_so_far = subset[subset['Action'].isin(['BUY', 'SELL'])]
-        wins = trades_so_far[trades_so_far['PnL'] > 0]['PnL']
-        losses = trades_so_far[trades_so_far['PnL'] < 0]['PnL']
-        win_rate = len(wins) / (len(wins) + len(losses)) if (len(wins) + len(losses)) > 0 else np.nan
-        avg_win = wins.mean() if not wins.empty else 0
-        avg_loss = losses.mean() if not losses.empty else 0
-        profit_factor = -avg_win / avg_loss if avg_loss != 0 else np.nan
-        trade_count = len(trades_so_far)
+        stats = trade_stats.loc[current_date]
+        win_rate = stats['Win Rate']
+        avg_win = stats['Avg Win']
+        avg_loss = stats['Avg Loss']
+        profit_factor = stats['Profit Factor']
+        trade_count = int(stats['Trade Count'])
 
         daily_metrics.append({
             'Date': pd.to_datetime(current_date),
@@ -77,7 +76,8 @@ def calculate_daily_metrics(df, symbol):
 
     return metrics_df, df, df['Drawdown'], export_df
 
-def plot_equity_and_drawdown(df, drawdown, symbol):
+def plot_equity_and_drawdown(df, drawdown, symbol, plot_folder=plot_folder):
+    plt = pyplot('seaborn')
     plt.figure(figsize=(14, 7))
     plt.plot(df.index, df['Equity'], label='Equity Curve', color='green')
     plt.title(f"{symbol} Equity Curve")
@@ -97,9 +97,10 @@ def plot_equity_and_drawdown(df, drawdown, symbol):
     plt.savefig(os.path.join(plot_folder, f"{symbol}_drawdown_curve.png"))
     plt.close()
 
-def plot_pnl_distribution(df, symbol):
+def plot_pnl_distribution(ledger, symbol, plot_folder=plot_folder):
+    plt = pyplot('seaborn')
     plt.figure(figsize=(8, 5))
-    df['PnL'].hist(bins=50, color='skyblue', edgecolor='black')
+    ledger['PnL'].hist(bins=50, color='skyblue', edgecolor='black')
     plt.title(f"{symbol} Trade PnL Distribution")
     plt.xlabel('PnL ($)')
     plt.ylabel('Frequency')
@@ -108,39 +109,50 @@ def plot_pnl_distribution(df, symbol):
     plt.close()
 
 # =========== 主程序入口 ===========
-all_metrics = []
-all_equity_data = []
+def main(symbols=None, trade_folder=trade_folder, plot_folder=plot_folder, strategy_folder=strategy_folder, plots=True):
+    os.makedirs(strategy_folder, exist_ok=True)
+    if plots:
+        os.makedirs(plot_folder, exist_ok=True)
+
+    all_metrics = []
+    all_equity_data = []
+
+    ledger = build_ledger(trade_folder, symbols)
+    ledger_by_symbol = dict(tuple(ledger.groupby('Symbol')))
 
-log_files = glob(os.path.join(trade_folder, "*_trade_log.csv"))
+    for file in list_trade_logs(trade_folder, symbols):
+        try:
+            symbol = os.path.basename(file).split('_trade_log.csv')[0]
+            df = pd.read_csv(file)
 
-for file in log_files:
-    try:
-        symbol = os.path.basename(file).split('_trade_log.csv')[0]
-        df = pd.read_csv(file)
+            symbol_ledger = ledger_by_symbol.get(symbol, ledger.iloc[:0])
+            metrics_df, df_processed, drawdown, export_df = calculate_daily_metrics(df, symbol, symbol_ledger)
 
-        metrics_df, df_processed, drawdown, export_df = calculate_daily_metrics(df, symbol)
+            all_metrics.append(metrics_df)
+            all_equity_data.append(export_df)
 
-        all_metrics.append(metrics_df)
-        all_equity_data.append(export_df)
+            # 单独保存每个 symbol 的 daily metrics
+            metrics_df.to_csv(os.path.join(strategy_folder, f"{symbol}_daily_metrics.csv"), index=False)
 
-        # 单独保存每个 symbol 的 daily metrics
-        metrics_df.to_csv(os.path.join(strategy_folder, f"{symbol}_daily_metrics.csv"), index=False)
+            if plots:
+                plot_equity_and_drawdown(df_processed, drawdown, symbol, plot_folder)
+                plot_pnl_distribution(symbol_ledger, symbol, plot_folder)
 
-        plot_equity_and_drawdown(df_processed, drawdown, symbol)
-        plot_pnl_distribution(df_processed, symbol)
+            print(f"✅ Processed {symbol}")
 
-        print(f"✅ Processed {symbol}")
+        except Exception as e:
+            print(f"⚠️ Error processing {file}: {e}")
 
-    except Exception as e:
-        print(f"⚠️ Error processing {file}: {e}")
+    # 合并保存
+    if all_metrics:
+        combined_metrics = pd.concat(all_metrics, ignore_index=True)
+        combined_metrics.to_csv(os.path.join(strategy_folder, "daily_trade_metrics_all.csv"), index=False)
 
-# 合并保存
-if all_metrics:
-    combined_metrics = pd.concat(all_metrics, ignore_index=True)
-    combined_metrics.to_csv(os.path.join(strategy_folder, "daily_trade_metrics_all.csv"), index=False)
+    if all_equity_data:
+        combined_df = pd.concat(all_equity_data, ignore_index=True)
+        combined_df.to_csv(os.path.join(strategy_folder, "equity_drawdown_pnl_all.csv"), index=False)
 
-if all_equity_data:
-    combined_df = pd.concat(all_equity_data, ignore_index=True)
-    combined_df.to_csv(os.path.join(strategy_folder, "equity_drawdown_pnl_all.csv"), index=False)
+    print("\n✅ Trade performance analysis completed. Results saved.")
 
-print("\n✅ Trade performance analysis completed. Results saved.")
+if __name__ == "__main__":
+    main()
@@ -2,95 +2,134 @@
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import os
+from qta.plotting import pyplot
 
 symbols = ["SPY", "QQQ", "IWM", "AAPL", "MSFT", "NVDA", "GOOGL", "META", "JPM", "BAC", "XOM", "CVX", "AMZN", "WMT", "JNJ"]
-data_folder = '../etl_pipeline/data'
-plot_folder = './plots'
-trade_folder = './trade_log'   # ✅ 新增
-os.makedirs(plot_folder, exist_ok=True)
-os.makedirs(trade_folder, exist_ok=True)  # ✅ 新增
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+data_folder = os.path.join(BASE_DIR, '..', 'etl_pipeline', 'data')
+plot_folder = os.path.join(BASE_DIR, 'plots')
+trade_folder = os.path.join(BASE_DIR, 'trade_log')
 
 initial_capital = 100000
-capital_per_stock = initial_capital / len(symbols)
-
-portfolio_value = pd.DataFrame()
-combined_trade_logs = []
-
-for symbol in symbols:
-    try:
-        df = pd.read_csv(os.path.join(data_folder, f"{symbol}_minute.csv"))
-        df['Datetime'] = pd.to_datetime(df['Datetime'])
-        df.sort_values('Datetime', inplace=True)
-        df = df[~df['Datetime'].duplicated()]  # ✅ 去重保证索引唯一
-        df.set_index('Datetime', inplace=True)
-
-        # 策略: 5min 均线上穿 20min 均线买入，下穿卖出
-        df['MA5'] = df['close'].rolling(window=5).mean()
-        df['MA20'] = df['close'].rolling(window=20).mean()
-        df['Signal'] = np.where(df['MA5'] > df['MA20'], 1, 0)
-        df['Position'] = df['Signal'].diff()
-
-        position = 0
-        cash = capital_per_stock
-        shares = 0
-        equity_curve = []
-        trade_logs = []
-
-        for idx, row in df.iterrows():
-            price = row['close']
-            if row['Position'] == 1 and cash > 0:
-                shares = cash // price
-                cash -= shares * price
-                trade_logs.append([symbol, idx, 'BUY', price, shares, cash])
-            elif row['Position'] == -1 and shares > 0:
-                cash += shares * price
-                trade_logs.append([symbol, idx, 'SELL', price, shares, cash])
-                shares = 0
-            equity = cash + shares * price
-            equity_curve.append(equity)
-
-        df['Equity'] = equity_curve
-        portfolio_value[symbol] = df['Equity']
-
-        # 保存个股交易日志 ✅
-        trade_log_df = pd.DataFrame(trade_logs, columns=['Symbol', 'Datetime', 'Action', 'Price', 'Shares', 'Cash_Remaining'])
-        trade_log_df.to_csv(os.path.join(trade_folder, f'{symbol}_trade_log.csv'), index=False)
-
-        # 合并到组合日志 ✅
-        combined_trade_logs.extend(trade_logs)
-
-        # 绘制个股资金曲线
-        plt.figure(figsize=(12, 6))
-        plt.plot(df.index, df['Equity'], label='Equity Curve')
-        plt.title(f'{symbol} Simulated Trading Equity Curve')
-        plt.xlabel('Time')
-        plt.ylabel('Equity ($)')
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(os.path.join(plot_folder, f'{symbol}_equity_curve.png'))
-        plt.close()
-
-        print(f"✅ Completed simulation for {symbol}")
-
-    except Exception as e:
-        print(f"⚠️ Error processing {symbol}: {e}")
-
-# 组合资金曲线
-portfolio_value['Total'] = portfolio_value.sum(axis=1)
-plt.figure(figsize=(14, 7))
-plt.plot(portfolio_value.index, portfolio_value['Total'], label='Portfolio Total Equity', color='blue')
-plt.title('Simulated Portfolio Total Equity Curve (12 Stocks)')
-plt.xlabel('Time')
-plt.ylabel('Equity ($)')
-plt.legend()
-plt.tight_layout()
-plt.savefig(os.path.join(plot_folder, 'portfolio_total_equity_curve.png'))
-plt.close()
-
-# 保存组合交易日志 ✅
-combined_trade_log_df = pd.DataFrame(combined_trade_logs, columns=['Symbol', 'Datetime', 'Action', 'Price', 'Shares', 'Cash_Remaining'])
-combined_trade_log_df.to_csv(os.path.join(trade_folder, 'combined_trade_log.csv'), index=False)
-
-print("\n✅ All simulations completed: Individual equity curves, portfolio curve, and trade logs saved to 'trade' folder.")
+
+TRADE_LOG_COLUMNS = ['Symbol', 'Datetime', 'Action', 'Price', 'Shares', 'Cash_Remaining']
+
+def simulate_symbol(df, symbol, capital):
+    df['Datetime'] = pd.to_datetime(df['Datetime'])
+    df.sort_values('Datetime', inplace=True)
+    df = df[~df['Datetime'].duplicated()]  # ✅ 去重保证索引唯一
+    df = df.set_index('Datetime')
+
+    # 策略: 5min 均线上穿 20min 均线买入，下穿卖出
+    df['MA5'] = df['close'].rolling(window=5).mean()
+    df['MA20'] = df['close'].rolling(window=20).mean()
+    df['Signal'] = np.where(df['MA5'] > df['MA20'], 1, 0)
+    df['Position'] = df['Signal'].diff()
+
+    cash = capital
+    shares = 0
+    equity_curve = []
+    trade_logs = []
+
+    for idx, row in df.iterrows():
+        price = row['close']
+        if row['Position'] == 1 and cash > 0:
+            shares = cash // price
+            cash -= shares * price
+            trade_logs.append([symbol, idx, 'BUY', price, shares, cash])
+        elif row['Position'] == -1 and shares > 0:
+            cash += shares * price
+            trade_logs.append([symbol, idx, 'SELL', price, shares, cash])
+            shares = 0
+        equity = cash + shares * price
+        equity_curve.append(equity)
+
+    df['Equity'] = equity_curve
+    return df, trade_logs
+
+def plot_equity_curve(df, symbol, plot_folder=plot_folder):
+    # 绘制个股资金曲线
+    plt = pyplot()
+    plt.figure(figsize=(12, 6))
+    plt.plot(df.index, df['Equity'], label='Equity Curve')
+    plt.title(f'{symbol} Simulated Trading Equity Curve')
+    plt.xlabel('Time')
+    plt.ylabel('Equity ($)')
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(os.path.join(plot_folder, f'{symbol}_equity_curve.png'))
+    plt.close()
+
+def plot_portfolio_equity(portfolio_value, stock_count, plot_folder=plot_folder):
+    plt = pyplot()
+    plt.figure(figsize=(14, 7))
+    plt.plot(portfolio_value.index, portfolio_value['Total'], label='Portfolio Total Equity', color='blue')
+    plt.title(f'Simulated Portfolio Total Equity Curve ({stock_count} Stocks)')
+    plt.xlabel('Time')
+    plt.ylabel('Equity ($)')
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(os.path.join(plot_folder, 'portfolio_total_equity_curve.png'))
+    plt.close()
+
+def main(symbols=symbols, data_folder=data_folder, plot_folder=plot_folder, trade_folder=trade_folder,
+         initial_capital=initial_capital, plots=True, universe=None):
+    os.makedirs(trade_folder, exist_ok=True)
+    if plots:
+        os.makedirs(plot_folder, exist_ok=True)
+
+    # 资金按整个股票池平分，只跑部分 symbol 时每只股票的资金与全量运行一致
+    universe = list(universe) if universe is not None else list(symbols)
+    outside = [s for s in symbols if s not in universe]
+    if outside:
+        raise ValueError(f"Symbols not in universe: {', '.join(outside)}")
+    capital_per_stock = initial_capital / len(universe)
+
+    portfolio_value = pd.DataFrame()
+    combined_trade_logs = []
+
+    for symbol in symbols:
+        try:
+            df = pd.read_csv(os.path.join(data_folder, f"{symbol}_minute.csv"))
+            df, trade_logs = simulate_symbol(df, symbol, capital_per_stock)
+            portfolio_value[symbol] = df['Equity']
+
+            # 保存个股交易日志 ✅
+            trade_log_df = pd.DataFrame(trade_logs, columns=TRADE_LOG_COLUMNS)
+            trade_log_df.to_csv(os.path.join(trade_folder, f'{symbol}_trade_log.csv'), index=False)
+
+            # 合并到组合日志 ✅
+            combined_trade_logs.extend(trade_logs)
+
+            if plots:
+                plot_equity_curve(df, symbol, plot_folder)
+
+            print(f"✅ Completed simulation for {symbol}")
+
+        except Exception as e:
+            print(f"⚠️ Error processing {symbol}: {e}")
+
+    # 组合资金曲线
+    portfolio_value['Total'] = portfolio_value.sum(axis=1)
+    if plots:
+        plot_portfolio_equity(portfolio_value, len(symbols), plot_folder)
+
+    # 保存组合交易日志 ✅
+    combined_trade_log_df = pd.DataFrame(combined_trade_logs, columns=TRADE_LOG_COLUMNS)
+    if set(symbols) != set(universe):
+        # 部分运行：其余 symbol 沿用已有的个股日志，组合日志仍覆盖整个股票池
+        frames = []
+        for s in universe:
+            path = os.path.join(trade_folder, f'{s}_trade_log.csv')
+            if s in symbols:
+                frames.append(combined_trade_log_df[combined_trade_log_df['Symbol'] == s])
+            elif os.path.exists(path):
+                frames.append(pd.read_csv(path))
+        combined_trade_log_df = pd.concat(frames, ignore_index=True)
+    combined_trade_log_df.to_csv(os.path.join(trade_folder, 'combined_trade_log.csv'), index=False)
+
+    print("\n✅ All simulations completed: Individual equity curves, portfolio curve, and trade logs saved to 'trade' folder.")
+
+if __name__ == "__main__":
+    main()